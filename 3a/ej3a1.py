@@ -29,8 +29,16 @@ def crear_conexion():
     """
     # Implementa la creación de la conexión y retorna el objeto conexión
     try:
-        conexion = sqlite3.connect(DB_PATH)
-        conexion.execute("PRAGMA encoding = 'UTF-8';")  
+        conexion = sqlite3.connect(DB_PATH, cached_statements=256)
+        conexion.execute("PRAGMA encoding = 'UTF-8';")
+        conexion.execute("PRAGMA foreign_keys = ON;")
+        if DB_PATH != ':memory:':
+            # Ajustes para bases de datos en archivo: WAL evita un fsync por commit
+            conexion.execute("PRAGMA journal_mode = WAL;")
+            conexion.execute("PRAGMA synchronous = NORMAL;")
+            conexion.execute("PRAGMA temp_store = MEMORY;")
+            conexion.execute("PRAGMA cache_size = -65536;")  # 64 MiB
+            conexion.execute("PRAGMA mmap_size = 268435456;")
         return conexion
     except sqlite3.Error as e:
         print(f"Error al conectar: {e}")
@@ -70,23 +78,21 @@ def insertar_autores(conexion, autores):
     """
     Inserta varios autores en la tabla 'autores'
     Parámetro autores: Lista de tuplas (nombre,)
+    No hace commit: el llamador agrupa las inserciones en una transacción (with conexion:)
     """
     # Implementa la inserción de autores usando SQL INSERT
     # Usa consultas parametrizadas para mayor seguridad
-    cursor = conexion.cursor()
-    cursor.executemany("INSERT INTO autores (nombre) VALUES (?)", autores)
-    conexion.commit()
+    conexion.executemany("INSERT INTO autores (nombre) VALUES (?)", autores)
 
 def insertar_libros(conexion, libros):
     """
     Inserta varios libros en la tabla 'libros'
     Parámetro libros: Lista de tuplas (titulo, anio, autor_id)
+    No hace commit: el llamador agrupa las inserciones en una transacción (with conexion:)
     """
     # Implementa la inserción de libros usando SQL INSERT
     # Usa consultas parametrizadas para mayor seguridad
-    cursor = conexion.cursor()
-    cursor.executemany("INSERT INTO libros (titulo, anio, autor_id) VALUES (?, ?, ?)", libros)
-    conexion.commit()
+    conexion.executemany("INSERT INTO libros (titulo, anio, autor_id) VALUES (?, ?, ?)", libros)
 
 def consultar_libros(conexion):
     """
@@ -94,9 +100,8 @@ def consultar_libros(conexion):
     """
     # Implementa una consulta SQL JOIN para obtener libros con sus autores
     # Imprime los resultados formateados
-    cursor = conexion.cursor()
     # Unir tablas libros y autores para obtener el nombre del autor
-    cursor.execute(
+    cursor = conexion.execute(
         """
         SELECT libros.titulo, autores.nombre, libros.anio
         FROM libros
@@ -115,9 +120,8 @@ def buscar_libros_por_autor(conexion, nombre_autor):
     """
     # Implementa una consulta SQL con WHERE para filtrar por autor
     # Retorna una lista de tuplas (titulo, anio)
-    cursor = conexion.cursor()
     # Buscar libros haciendo JOIN con autores y filtrando por nombre
-    cursor.execute(
+    return conexion.execute(
         """
         SELECT libros.titulo, libros.anio
         FROM libros
@@ -126,48 +130,29 @@ def buscar_libros_por_autor(conexion, nombre_autor):
         ORDER BY libros.id
         """,
         (nombre_autor,)
-    )
-    return cursor.fetchall()
+    ).fetchall()
 
 def actualizar_libro(conexion, id_libro, nuevo_titulo=None, nuevo_anio=None):
     """
     Actualiza la información de un libro existente
+    No hace commit: el llamador agrupa la actualización en una transacción (with conexion:)
     """
     # Implementa la actualización usando SQL UPDATE
-    # Solo actualiza los campos que no son None
-    cursor = conexion.cursor()
-
-    if nuevo_titulo is not None and nuevo_anio is not None:
-        cursor.execute("""
-            UPDATE libros
-            SET titulo = ?, anio = ?
-            WHERE id = ?;
-        """, (nuevo_titulo, nuevo_anio, id_libro))
-
-    elif nuevo_titulo is not None:
-        cursor.execute("""
-            UPDATE libros
-            SET titulo = ?
-            WHERE id = ?;
-        """, (nuevo_titulo, id_libro))
-
-    elif nuevo_anio is not None:
-        cursor.execute("""
-            UPDATE libros
-            SET anio = ?
-            WHERE id = ?;
-        """, (nuevo_anio, id_libro))
-
-    conexion.commit()
+    # Solo actualiza los campos que no son None: COALESCE conserva el valor actual,
+    # así una única sentencia (cacheada) cubre todas las combinaciones
+    conexion.execute("""
+        UPDATE libros
+        SET titulo = COALESCE(?, titulo), anio = COALESCE(?, anio)
+        WHERE id = ?;
+    """, (nuevo_titulo, nuevo_anio, id_libro))
 
 def eliminar_libro(conexion, id_libro):
     """
     Elimina un libro por su ID
+    No hace commit: el llamador agrupa la eliminación en una transacción (with conexion:)
     """
     # Implementa la eliminación usando SQL DELETE
-    cursor = conexion.cursor()
-    cursor.execute("DELETE FROM libros WHERE id = ?", (id_libro,))
-    conexion.commit()
+    conexion.execute("DELETE FROM libros WHERE id = ?", (id_libro,))
 
 def ejemplo_transaccion(conexion):
     """
@@ -175,21 +160,21 @@ def ejemplo_transaccion(conexion):
     """
     
     try:
-        conexion.execute("BEGIN TRANSACTION")
-        cursor = conexion.cursor()
-
-        # Insertar autor y usar su id para el libro (evita suponer id = 1)
-        cursor.execute("INSERT INTO autores (nombre) VALUES (?)", ("Autor transacción",))
-        autor_id = cursor.lastrowid
-        cursor.execute(
-            "INSERT INTO libros (titulo, anio, autor_id) VALUES (?, ?, ?)",
-            ("Libro TX", 2025, autor_id)
-        )
-
-        conexion.commit()
+        # with conexion: hace commit al salir o rollback si hay una excepción.
+        # Sin un BEGIN explícito, si el llamador ya tenía una transacción abierta
+        # (p. ej. tras insertar_autores) estas sentencias se suman a ella
+        with conexion:
+            cursor = conexion.cursor()
+
+            # Insertar autor y usar su id para el libro (evita suponer id = 1)
+            cursor.execute("INSERT INTO autores (nombre) VALUES (?)", ("Autor transacción",))
+            autor_id = cursor.lastrowid
+            cursor.execute(
+                "INSERT INTO libros (titulo, anio, autor_id) VALUES (?, ?, ?)",
+                ("Libro TX", 2025, autor_id)
+            )
 
     except sqlite3.Error:
-        conexion.rollback()
         print("Transacción revertida por error")
 
 if __name__ == "__main__":
@@ -200,16 +185,11 @@ if __name__ == "__main__":
         print("Creando tablas...")
         crear_tablas(conexion)
 
-        # Insertar autores
         autores = [
             ("Gabriel García Márquez",),
             ("Isabel Allende",),
             ("Jorge Luis Borges",)
         ]
-        insertar_autores(conexion, autores)
-        print("Autores insertados correctamente")
-
-        # Insertar libros
         libros = [
             ("Cien años de soledad", 1967, 1),
             ("El amor en los tiempos del cólera", 1985, 1),
@@ -218,8 +198,14 @@ if __name__ == "__main__":
             ("Ficciones", 1944, 3),
             ("El Aleph", 1949, 3)
         ]
-        insertar_libros(conexion, libros)
-        print("Libros insertados correctamente")
+
+        # Insertar autores y libros en una única transacción (un solo commit)
+        with conexion:
+            insertar_autores(conexion, autores)
+            print("Autores insertados correctamente")
+
+            insertar_libros(conexion, libros)
+            print("Libros insertados correctamente")
 
         print("\n--- Lista de todos los libros con sus autores ---")
         consultar_libros(conexion)
@@ -232,12 +218,14 @@ if __name__ == "__main__":
             print(f"- {titulo} ({anio})")
 
         print("\n--- Actualización de un libro ---")
-        actualizar_libro(conexion, 1, nuevo_titulo="Cien años de soledad (Edición especial)")
+        with conexion:
+            actualizar_libro(conexion, 1, nuevo_titulo="Cien años de soledad (Edición especial)")
         print("Libro actualizado. Nueva información:")
         consultar_libros(conexion)
 
         print("\n--- Eliminación de un libro ---")
-        eliminar_libro(conexion, 6)  # Elimina "El Aleph"
+        with conexion:
+            eliminar_libro(conexion, 6)  # Elimina "El Aleph"
         print("Libro eliminado. Lista actualizada:")
         consultar_libros(conexion)
 
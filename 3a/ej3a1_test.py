@@ -226,6 +226,20 @@ def test_eliminar_libro(db_con_datos):
     cursor.execute("SELECT COUNT(*) FROM libros;")
     assert cursor.fetchone()[0] == 5
 
+def test_eliminar_libro_no_confirma_transaccion(db_con_datos):
+    """Prueba que eliminar_libro no hace commit de la transacción del llamador"""
+    with pytest.raises(RuntimeError):
+        with db_con_datos:
+            insertar_autores(db_con_datos, [("Autor temporal",)])
+            eliminar_libro(db_con_datos, 6)
+            raise RuntimeError("fallo simulado")
+
+    cursor = db_con_datos.cursor()
+    cursor.execute("SELECT COUNT(*) FROM autores WHERE nombre = 'Autor temporal';")
+    assert cursor.fetchone()[0] == 0
+    cursor.execute("SELECT COUNT(*) FROM libros WHERE id = 6;")
+    assert cursor.fetchone()[0] == 1
+
 def test_ejemplo_transaccion(db_con_datos):
     """Prueba la función ejemplo_transaccion"""
     # Obtener el estado inicial de la base de datos
@@ -243,3 +257,16 @@ def test_ejemplo_transaccion(db_con_datos):
     # La implementación específica dependerá del estudiante,
     # pero comprobamos que al menos la función no genera errores
     assert True  # No errores = prueba pasa
+
+def test_ejemplo_transaccion_con_transaccion_pendiente(db_con_tablas, capfd):
+    """Prueba ejemplo_transaccion tras un helper que no hace commit"""
+    insertar_autores(db_con_tablas, [("A",), ("B",)])
+
+    ejemplo_transaccion(db_con_tablas)
+
+    assert "revertida" not in capfd.readouterr().out
+    cursor = db_con_tablas.cursor()
+    cursor.execute("SELECT nombre FROM autores ORDER BY id;")
+    assert [fila[0] for fila in cursor.fetchall()] == ["A", "B", "Autor transacción"]
+    cursor.execute("SELECT COUNT(*) FROM libros;")
+    assert cursor.fetchone()[0] == 1
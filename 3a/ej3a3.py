@@ -12,14 +12,44 @@ usando diferentes técnicas.
 """
 
 import sqlite3
+import queue
 import pandas as pd
 import os
-import json
-from typing import List, Dict, Any, Optional, Tuple, Union
+import pathlib
+from contextlib import contextmanager
+from typing import Iterator, List, Dict, Any, Optional, Tuple, Union
 
 # Ruta a la base de datos SQLite
 DB_PATH = os.path.join(os.path.dirname(__file__), 'ventas_comerciales.db')
 
+# Consultas JOIN entre tablas relacionadas (nombre del DataFrame -> SELECT)
+CONSULTAS_COMBINADAS = {
+    'ventas_productos': """
+        SELECT ventas.*, productos.nombre AS producto_nombre, productos.categoria, productos.precio_unitario
+        FROM ventas
+        JOIN productos ON ventas.producto_id = productos.id
+    """,
+    'ventas_vendedores': """
+        SELECT ventas.*, vendedores.nombre AS vendedor_nombre, vendedores.region_id
+        FROM ventas
+        JOIN vendedores ON ventas.vendedor_id = vendedores.id
+    """,
+    'vendedores_regiones': """
+        SELECT vendedores.*, regiones.nombre AS region_nombre, regiones.pais
+        FROM vendedores
+        JOIN regiones ON vendedores.region_id = regiones.id
+    """,
+}
+
+# Columnas de fecha conocidas, para que pandas no tenga que inferir su tipo
+COLUMNAS_FECHA = {
+    'ventas': ['fecha'],
+    'vendedores': ['fecha_contratacion'],
+    'ventas_productos': ['fecha'],
+    'ventas_vendedores': ['fecha'],
+    'vendedores_regiones': ['fecha_contratacion'],
+}
+
 def conectar_bd() -> sqlite3.Connection:
     """
     Conecta a una base de datos SQLite existente
@@ -38,6 +68,90 @@ def conectar_bd() -> sqlite3.Connection:
     conexion.row_factory = sqlite3.Row
     return conexion
 
+
+# Pool de conexiones de solo lectura reutilizables entre llamadas
+# POOL_MAX_CONEXIONES limita las conexiones inactivas que se conservan
+POOL_MAX_CONEXIONES = 4
+_pool_conexiones: "queue.Queue[sqlite3.Connection]" = queue.Queue(maxsize=POOL_MAX_CONEXIONES)
+
+
+def _abrir_conexion_lectura() -> sqlite3.Connection:
+    """
+    Abre una conexión de solo lectura configurada para el pool
+    """
+    if not os.path.exists(DB_PATH):
+        raise FileNotFoundError(f"La base de datos no existe en la ruta: {DB_PATH}")
+    # mode=ro impide modificar el archivo pero permite crear vistas temporales
+    # as_uri() codifica la ruta (caracteres como ?, # o % en el directorio)
+    uri = pathlib.Path(DB_PATH).resolve().as_uri() + "?mode=ro"
+    conexion = sqlite3.connect(uri, uri=True, check_same_thread=False)
+    conexion.row_factory = sqlite3.Row
+    conexion.execute("PRAGMA temp_store = MEMORY;")
+    conexion.execute("PRAGMA cache_size = -65536;")  # 64 MiB
+    conexion.execute("PRAGMA mmap_size = 268435456;")
+    return conexion
+
+
+@contextmanager
+def obtener_conexion() -> Iterator[sqlite3.Connection]:
+    """
+    Presta una conexión del pool y la devuelve al terminar, de modo que la caché
+    de páginas de SQLite se mantiene caliente entre usos
+
+    Si el pool está vacío se abre una conexión nueva: no se limita el número de
+    préstamos simultáneos, solo las conexiones que se conservan (POOL_MAX_CONEXIONES).
+    La conexión solo vuelve al pool si el bloque termina sin excepción y sigue
+    abierta; en otro caso se cierra y se descarta
+
+    Yields:
+        sqlite3.Connection: Conexión de solo lectura a la base de datos
+    """
+    try:
+        conexion = _pool_conexiones.get_nowait()
+    except queue.Empty:
+        conexion = _abrir_conexion_lectura()
+    try:
+        yield conexion
+    except BaseException:
+        conexion.close()
+        raise
+
+    try:
+        # Comprueba que el llamador no la ha cerrado (lanza ProgrammingError si está cerrada)
+        conexion.total_changes
+        _pool_conexiones.put_nowait(conexion)
+    except sqlite3.ProgrammingError:
+        pass
+    except queue.Full:
+        conexion.close()
+
+
+def cerrar_pool() -> None:
+    """
+    Cierra todas las conexiones que quedan en el pool
+    """
+    while True:
+        try:
+            _pool_conexiones.get_nowait().close()
+        except queue.Empty:
+            break
+
+def _listar_tablas(conexion: sqlite3.Connection) -> List[str]:
+    """
+    Devuelve los nombres de las tablas registradas en sqlite_master
+    """
+    return [t[0] for t in conexion.execute("SELECT name FROM sqlite_master WHERE type='table';")]
+
+
+def _sql_select_tabla(tabla: str) -> str:
+    """
+    Construye un SELECT * para la tabla con el identificador entre comillas dobles
+    (escapando las comillas internas), de modo que el texto SQL es siempre el mismo
+    para cada tabla y se reutiliza desde la caché de sentencias de sqlite3
+    """
+    return 'SELECT * FROM "{}"'.format(tabla.replace('"', '""'))
+
+
 def convertir_a_json(conexion: sqlite3.Connection) -> Dict[str, List[Dict[str, Any]]]:
     """
     Convierte los datos de la base de datos en un objeto compatible con JSON
@@ -60,23 +174,16 @@ def convertir_a_json(conexion: sqlite3.Connection) -> Dict[str, List[Dict[str, A
     # 4. Retorna el diccionario completo con todas las tablas
     resultado: Dict[str, List[Dict[str, Any]]] = {}
     cursor = conexion.cursor()
+    # sqlite3.Row permite construir cada diccionario con dict(fila) en C,
+    # sin recorrer los nombres de columna en Python
+    cursor.row_factory = sqlite3.Row
 
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-    tablas = [t[0] for t in cursor.fetchall()]
-
-    for tabla in tablas:
-        # Obtener filas
-        cursor.execute(f"SELECT * FROM {tabla}")
-        filas = cursor.fetchall()
-
-        # Obtener nombres de columnas
-        colnames = [desc[0] for desc in cursor.description] if cursor.description else []
-
-        registros: List[Dict[str, Any]] = []
-        for fila in filas:
-            # fila es una tupla; convertir a dict
-            registro = {col: fila[idx] for idx, col in enumerate(colnames)}
-            registros.append(registro)
+    # Solo se consultan tablas obtenidas de sqlite_master, nunca nombres externos
+    for tabla in _listar_tablas(conexion):
+        # Recorrer el cursor directamente en lugar de fetchall(): las filas se
+        # convierten a diccionario según llegan, sin una lista intermedia de tuplas
+        cursor.execute(_sql_select_tabla(tabla))
+        registros: List[Dict[str, Any]] = [dict(fila) for fila in cursor]
 
         resultado[tabla] = registros
 
@@ -104,53 +211,26 @@ def convertir_a_dataframes(conexion: sqlite3.Connection) -> Dict[str, pd.DataFra
     #    - Vendedores con regiones
     # 5. Retorna el diccionario con todos los DataFrames
     dfs: Dict[str, pd.DataFrame] = {}
-    cursor = conexion.cursor()
-    cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-    tablas = [t[0] for t in cursor.fetchall()]
 
-    for tabla in tablas:
+    for tabla in _listar_tablas(conexion):
         try:
-            df = pd.read_sql_query(f"SELECT * FROM {tabla}", conexion)
+            df = pd.read_sql_query(
+                _sql_select_tabla(tabla), conexion, parse_dates=COLUMNAS_FECHA.get(tabla)
+            )
         except Exception:
             df = pd.DataFrame()
         dfs[tabla] = df
 
-    # Añadir consultas combinadas relevantes
-    try:
-        dfs['ventas_productos'] = pd.read_sql_query(
-            """
-            SELECT ventas.*, productos.nombre AS producto_nombre, productos.categoria, productos.precio_unitario
-            FROM ventas
-            JOIN productos ON ventas.producto_id = productos.id
-            """,
-            conexion
-        )
-    except Exception:
-        pass
-
-    try:
-        dfs['ventas_vendedores'] = pd.read_sql_query(
-            """
-            SELECT ventas.*, vendedores.nombre AS vendedor_nombre, vendedores.region_id
-            FROM ventas
-            JOIN vendedores ON ventas.vendedor_id = vendedores.id
-            """,
-            conexion
-        )
-    except Exception:
-        pass
-
-    try:
-        dfs['vendedores_regiones'] = pd.read_sql_query(
-            """
-            SELECT vendedores.*, regiones.nombre AS region_nombre, regiones.pais
-            FROM vendedores
-            JOIN regiones ON vendedores.region_id = regiones.id
-            """,
-            conexion
-        )
-    except Exception:
-        pass
+    # Añadir consultas combinadas relevantes: cada JOIN se define una vez como
+    # vista temporal de la conexión y se lee con un SELECT sencillo
+    for nombre, consulta in CONSULTAS_COMBINADAS.items():
+        try:
+            conexion.execute(f"CREATE TEMP VIEW IF NOT EXISTS v_{nombre} AS {consulta}")
+            dfs[nombre] = pd.read_sql_query(
+                f"SELECT * FROM v_{nombre}", conexion, parse_dates=COLUMNAS_FECHA.get(nombre)
+            )
+        except Exception:
+            pass
 
     return dfs
 
@@ -181,8 +261,9 @@ if __name__ == "__main__":
 
             # Opcional: guardar los datos en un archivo JSON
             # ruta_json = os.path.join(os.path.dirname(__file__), 'ventas_comerciales.json')
-            # with open(ruta_json, 'w', encoding='utf-8') as f:
-            #     json.dump(datos_json, f, ensure_ascii=False, indent=2)
+            # import orjson
+            # with open(ruta_json, 'wb') as f:
+            #     f.write(orjson.dumps(datos_json, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
             # print(f"Datos guardados en {ruta_json}")
 
         # Conversión a DataFrames de pandas
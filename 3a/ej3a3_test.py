@@ -8,7 +8,7 @@ import sqlite3
 import os
 import json
 import pandas as pd
-from ej3a3 import conectar_bd, convertir_a_json, convertir_a_dataframes
+from ej3a3 import conectar_bd, convertir_a_json, convertir_a_dataframes, obtener_conexion, cerrar_pool
 
 # Path to database file
 DB_PATH = os.path.join(os.path.dirname(__file__), 'ventas_comerciales.db')
@@ -313,3 +313,43 @@ def test_convertir_a_dataframes_data(conexion_bd):
         df_join = dataframes[df_join_name]
         # Un DataFrame con join debería tener más columnas que las tablas individuales
         assert len(df_join.columns) > len(dataframes["ventas"].columns), f"El DataFrame {df_join_name} no parece contener un join válido"
+
+def test_obtener_conexion_reutiliza_pool():
+    """
+    Prueba el pool de conexiones
+    Verifica que la conexión se devuelve al pool, se reutiliza y es de solo lectura
+    """
+    try:
+        with obtener_conexion() as conn:
+            primera = conn
+            datos_json = convertir_a_json(conn)
+            assert "ventas" in datos_json
+
+        with obtener_conexion() as conn:
+            assert conn is primera
+            with pytest.raises(sqlite3.OperationalError):
+                conn.execute("DELETE FROM ventas")
+    finally:
+        cerrar_pool()
+
+
+def test_obtener_conexion_descarta_conexiones_invalidas():
+    """
+    Prueba que el pool no reutiliza conexiones cerradas ni las usadas en un bloque con error
+    """
+    try:
+        with obtener_conexion() as conn:
+            conn.close()
+        with obtener_conexion() as conn:
+            assert conn.execute("SELECT 1").fetchone()[0] == 1
+
+        with pytest.raises(RuntimeError):
+            with obtener_conexion() as conn:
+                con_error = conn
+                raise RuntimeError("fallo simulado")
+        with obtener_conexion() as conn:
+            assert conn is not con_error
+        with pytest.raises(sqlite3.ProgrammingError):
+            con_error.execute("SELECT 1")
+    finally:
+        cerrar_pool()
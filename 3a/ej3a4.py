@@ -20,43 +20,37 @@ import sys
 from typing import List, Tuple, Optional
 
 import pymongo
+from bson.errors import InvalidId
 from bson.objectid import ObjectId
 
 # Configuración de MongoDB (la debes obtener de "docker-compose.yml"):
 DB_NAME = "biblioteca"
-MONGODB_PORT = 0
-MONGODB_HOST = ""
-MONGODB_USERNAME = ""
-MONGODB_PASSWORD = ""
+MONGODB_PORT = 27017
+MONGODB_HOST = "localhost"
+MONGODB_USERNAME = "testuser"
+MONGODB_PASSWORD = "testpass"
+
+
+def _uri_mongodb() -> str:
+    """
+    Construye la URI de conexión a partir de la configuración
+    """
+    return f"mongodb://{MONGODB_USERNAME}:{MONGODB_PASSWORD}@{MONGODB_HOST}:{MONGODB_PORT}/"
 
 def verificar_docker_instalado() -> bool:
     """
     Verifica si Docker está instalado en el sistema y el usuario tiene permisos
     """
     try:
-        # Verificar si docker está instalado
-        result = subprocess.run(["docker", "--version"],
-                                stdout=subprocess.PIPE,
-                                stderr=subprocess.PIPE,
-                                text=True)
-        if result.returncode != 0:
-            return False
-
-        # Verificar si docker-compose está instalado
-        result = subprocess.run(["docker", "compose", "version"],
-                                stdout=subprocess.PIPE,
-                                stderr=subprocess.PIPE,
-                                text=True)
-        if result.returncode != 0:
-            return False
-
-        # Verificar permisos de Docker
-        result = subprocess.run(["docker", "ps"],
+        # Una sola llamada comprueba a la vez que el binario existe, que el daemon
+        # responde y que el usuario tiene permisos para usarlo
+        result = subprocess.run(["docker", "info", "--format", "{{.ServerVersion}}"],
                                 stdout=subprocess.PIPE,
                                 stderr=subprocess.PIPE,
-                                text=True)
-        return result.returncode == 0
-    except FileNotFoundError:
+                                text=True,
+                                timeout=3)
+        return result.returncode == 0 and bool(result.stdout.strip())
+    except (FileNotFoundError, subprocess.TimeoutExpired):
         return False
 
 def iniciar_mongodb_docker() -> bool:
@@ -89,8 +83,10 @@ def iniciar_mongodb_docker() -> bool:
             print(f"Error al iniciar MongoDB: {result.stderr}")
             return False
 
-        # Dar tiempo para que MongoDB se inicie completamente
-        time.sleep(5)
+        # Esperar a que MongoDB esté listo en lugar de dormir un tiempo fijo
+        if not esperar_mongodb():
+            print("MongoDB no respondió a tiempo")
+            return False
         return True
 
     except subprocess.CalledProcessError as e:
@@ -100,6 +96,26 @@ def iniciar_mongodb_docker() -> bool:
         print(f"Error inesperado: {e}")
         return False
 
+def esperar_mongodb(intentos: int = 20) -> bool:
+    """
+    Espera a que MongoDB acepte escrituras, reintentando con espera exponencial
+    (0.25s, 0.5s, 1s, ... hasta un máximo de 2s entre intentos)
+    """
+    for intento in range(intentos):
+        # directConnection: se consulta al nodo aunque el replica set aún no tenga primario
+        client = pymongo.MongoClient(
+            _uri_mongodb(), serverSelectionTimeoutMS=500, directConnection=True
+        )
+        try:
+            if client.admin.command('hello').get('isWritablePrimary'):
+                return True
+        except pymongo.errors.PyMongoError:
+            pass
+        finally:
+            client.close()
+        time.sleep(min(0.25 * 2 ** intento, 2))
+    return False
+
 def detener_mongodb_docker() -> None:
     """
     Detiene el contenedor de MongoDB
@@ -122,8 +138,10 @@ def crear_conexion() -> pymongo.database.Database:
     """
     # Debes conectarte a la base de datos MongoDB usando PyMongo
     client = pymongo.MongoClient(
-        f"mongodb://{MONGODB_USERNAME}:{MONGODB_PASSWORD}@{MONGODB_HOST}:{MONGODB_PORT}/",
-        serverSelectionTimeoutMS=5000  # 5 segundos de timeout
+        _uri_mongodb(),
+        serverSelectionTimeoutMS=5000,  # 5 segundos de timeout
+        maxPoolSize=10,
+        minPoolSize=1
     )
 
     try:
@@ -131,6 +149,7 @@ def crear_conexion() -> pymongo.database.Database:
         client.admin.command('ping')
     except Exception as e:
         print(f"No se pudo conectar a MongoDB: {e}")
+        client.close()
         raise
 
     # Obtener o crear la base de datos
@@ -145,13 +164,19 @@ def crear_colecciones(db: pymongo.database.Database) -> None:
     pero podemos crear índices para optimizar el rendimiento.
     """
     # Debes crear colecciones para 'autores' y 'libros'
-     # 1. Crear colección de autores con índice por nombre
-    db.autores.create_index("nombre", unique=True)
+    # Cada create_indexes envía todos los índices de la colección en un solo comando
+    # 1. Crear colección de autores con índice por nombre
+    db.autores.create_indexes([
+        pymongo.IndexModel([("nombre", pymongo.ASCENDING)], unique=True)
+    ])
 
     # 2. Crear colección de libros con índices
-    db.libros.create_index([("titulo", pymongo.ASCENDING)])
-    db.libros.create_index([("autor_id", pymongo.ASCENDING)])
-    db.libros.create_index([("anio", pymongo.ASCENDING)])
+    # (autor_id, _id) también sirve el orden por _id de buscar_libros_por_autor
+    db.libros.create_indexes([
+        pymongo.IndexModel([("titulo", pymongo.ASCENDING)]),
+        pymongo.IndexModel([("autor_id", pymongo.ASCENDING), ("_id", pymongo.ASCENDING)]),
+        pymongo.IndexModel([("anio", pymongo.ASCENDING)])
+    ])
 
 
 
@@ -168,34 +193,48 @@ def insertar_autores(db: pymongo.database.Database, autores: List[Tuple[str]]) -
         nombre = autor[0] if isinstance(autor, (list, tuple)) else autor
         documentos.append({'nombre': nombre})
 
-    result = db.autores.insert_many(documentos)
+    # ordered=False: los documentos son independientes y el servidor puede aplicarlos
+    # sin serializarlos; un duplicado en 'nombre' no detiene al resto
+    result = db.autores.insert_many(documentos, ordered=False)
     # Devolver los IDs como strings
     return [str(_id) for _id in result.inserted_ids]
 
+def _a_object_id(valor):
+    """
+    Convierte un string a ObjectId; si no es posible, devuelve el valor original
+    """
+    if isinstance(valor, str):
+        try:
+            return ObjectId(valor)
+        except InvalidId:
+            return valor
+    return valor
+
 def insertar_libros(db: pymongo.database.Database, libros: List[Tuple[str, int, str]]) -> List[str]:
     """
     Inserta varios libros en la colección 'libros'
     """
     # Debes realizar los siguientes pasos:
     # 1. Convertir las tuplas a documentos
-    docs_autores = []
-    for titulo, anio, autor_id in libros:
-        # Convertir autor_id a ObjectId si es string
-        if isinstance(autor_id, str):
-            try:
-                autor_obj = ObjectId(autor_id)
-            except Exception:
-                autor_obj = autor_id
-        else:
-            autor_obj = autor_id
-
-        docs_autores.append({
-            'titulo': titulo,
-            'anio': anio,
-            'autor_id': autor_obj
-        })  
+    autor_ids = [autor_id for _, _, autor_id in libros]
+    autor_objs = None
+    if all(isinstance(autor_id, str) for autor_id in autor_ids):
+        # Caso habitual: todos los autor_id son strings válidos y se convierten de una vez
+        try:
+            autor_objs = list(map(ObjectId, autor_ids))
+        except InvalidId:
+            pass
+    if autor_objs is None:
+        # Convertir a ObjectId solo los strings válidos; el resto se guarda tal cual
+        autor_objs = [_a_object_id(autor_id) for autor_id in autor_ids]
+
+    docs_autores = [
+        {'titulo': titulo, 'anio': anio, 'autor_id': autor_obj}
+        for (titulo, anio, _), autor_obj in zip(libros, autor_objs)
+    ]
+
     # 2. Insertar los documentos
-    result = db.libros.insert_many(docs_autores)
+    result = db.libros.insert_many(docs_autores, ordered=False)
     
     # 3. Devolver los IDs como strings
     return [str(_id) for _id in result.inserted_ids]
@@ -210,10 +249,14 @@ def consultar_libros(db: pymongo.database.Database) -> None:
      # 1. Realizar una agregación para unir libros con autores
     pipeline = [
         {
+            # Forma con pipeline: del autor solo se trae el nombre
             "$lookup": {
                 "from": "autores",
-                "localField": "autor_id",
-                "foreignField": "_id",
+                "let": {"aid": "$autor_id"},
+                "pipeline": [
+                    {"$match": {"$expr": {"$eq": ["$_id", "$$aid"]}}},
+                    {"$project": {"_id": 0, "nombre": 1}}
+                ],
                 "as": "autor"
             }
         },
@@ -222,6 +265,7 @@ def consultar_libros(db: pymongo.database.Database) -> None:
         },
         {
             "$project": {
+                "_id": 0,
                 "titulo": 1,
                 "anio": 1,
                 "autor_nombre": "$autor.nombre"
@@ -232,7 +276,7 @@ def consultar_libros(db: pymongo.database.Database) -> None:
         }
     ]
 
-    resultados = db.libros.aggregate(pipeline)
+    resultados = db.libros.aggregate(pipeline, allowDiskUse=False, batchSize=1000)
 
     # 2. Mostrar los resultados
     for libro in resultados:
@@ -245,15 +289,16 @@ def buscar_libros_por_autor(db: pymongo.database.Database, nombre_autor: str) ->
     # Debes realizar los siguientes pasos:
     # 1. Primero encontrar el autor y buscar todos los libros del autor
     # 2. Convertir a lista de tuplas (titulo, anio)
-    autor = db.autores.find_one({'nombre': nombre_autor})
+    autor = db.autores.find_one({'nombre': nombre_autor}, {'_id': 1})
     if not autor:
         return []
 
-    autor_id = autor.get('_id')
-    resultados = []
-    for libro in db.libros.find({'autor_id': autor_id}).sort([('_id', 1)]):
-        resultados.append((libro.get('titulo'), libro.get('anio')))
-    return resultados
+    # Proyección: solo viajan titulo y anio; el índice (autor_id, _id) sirve el sort
+    cursor = db.libros.find(
+        {'autor_id': autor['_id']},
+        {'_id': 0, 'titulo': 1, 'anio': 1}
+    ).sort([('_id', 1)])
+    return [(libro.get('titulo'), libro.get('anio')) for libro in cursor]
 
 def actualizar_libro(
         db: pymongo.database.Database,
@@ -303,31 +348,29 @@ def eliminar_libro(
 
 def ejemplo_transaccion(db: pymongo.database.Database) -> bool:
     """
-    Demuestra el uso de operaciones agrupadas
+    Demuestra el uso de transacciones multi-documento
+    (requiere que MongoDB se ejecute como replica set, ver docker-compose.yml)
     """
     # Debes realizar los siguientes pasos:
     # 1. Insertar un nuevo autor
     # 2. Insertar dos libros del autor
-    # Intentar limpiar los datos en caso de error
+    # Si algo falla, la transacción se aborta y no queda ningún documento a medias
     try:
-        # Insertar autor
-        autor_res = db.autores.insert_one({'nombre': 'Autor transacción'})
-        autor_id = autor_res.inserted_id
-
-        # Insertar dos libros
-        docs = [
-            {'titulo': 'Libro TX 1', 'anio': 2025, 'autor_id': autor_id},
-            {'titulo': 'Libro TX 2', 'anio': 2025, 'autor_id': autor_id}
-        ]
-        db.libros.insert_many(docs)
+        with db.client.start_session() as sesion:
+            with sesion.start_transaction():
+                # Insertar autor
+                autor_id = db.autores.insert_one(
+                    {'nombre': 'Autor transacción'}, session=sesion
+                ).inserted_id
+
+                # Insertar dos libros
+                docs = [
+                    {'titulo': 'Libro TX 1', 'anio': 2025, 'autor_id': autor_id},
+                    {'titulo': 'Libro TX 2', 'anio': 2025, 'autor_id': autor_id}
+                ]
+                db.libros.insert_many(docs, session=sesion, ordered=False)
         return True
     except Exception:
-        # Intentar limpiar en caso de error
-        try:
-            db.libros.delete_many({'titulo': {'$regex': '^Libro TX'}})
-            db.autores.delete_many({'nombre': 'Autor transacción'})
-        except Exception:
-            pass
         return False
 
 
@@ -397,8 +440,9 @@ if __name__ == "__main__":
     except Exception as e:
         print(f"Error: {e}")
     finally:
-        # Cerrar la conexión a MongoDB
-        if db:
+        # Cerrar la conexión a MongoDB (pool de sockets e hilos de monitorización)
+        if db is not None:
+            db.client.close()
             print("\nConexión a MongoDB cerrada.")
 
         # Detener el proceso de MongoDB si lo iniciamos nosotros
@@ -13,11 +13,83 @@ Implementa un sistema simple de gestión de biblioteca utilizando SQLAlchemy par
 Este ejercicio se enfoca en SQLAlchemy Core y ORM sin depender de Flask u otro framework web.
 """
 
-from sqlalchemy import create_engine, Column, Integer, String, ForeignKey
+import logging
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import create_engine, event, insert, Column, Integer, String, ForeignKey
 from sqlalchemy.orm import declarative_base, relationship, sessionmaker, joinedload
+from sqlalchemy.pool import StaticPool
 
 # Crea el motor de base de datos (usamos SQLite en memoria para simplificar)
-engine = create_engine('sqlite:///:memory:', echo=True)
+# query_cache_size amplía la caché de sentencias compiladas (500 por defecto)
+# echo=False: no se formatea ni se registra cada sentencia SQL (para depurar un
+# fragmento concreto, usar el context manager sql_trace)
+# StaticPool: una única conexión compartida, así la base de datos en memoria
+# se conserva entre sesiones
+engine = create_engine(
+    'sqlite:///:memory:',
+    echo=False,
+    query_cache_size=1200,
+    connect_args={'check_same_thread': False},
+    poolclass=StaticPool
+)
+
+
+@event.listens_for(engine, 'connect')
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Aplica los PRAGMA de rendimiento a cada nueva conexión SQLite"""
+    # Con una base de datos en archivo, WAL y synchronous=NORMAL reducen los fsync
+    # por commit (en memoria, journal_mode=WAL no tiene efecto)
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute('PRAGMA temp_store=MEMORY')
+    cursor.execute('PRAGMA cache_size=-65536')
+    cursor.close()
+
+
+# Fábrica de sesiones creada una sola vez para todo el módulo
+# expire_on_commit=False: los objetos siguen cargados tras el commit (sin SELECT de recarga)
+# autoflush=False: las consultas no vuelcan cambios pendientes de forma implícita
+Session = sessionmaker(bind=engine, expire_on_commit=False, autoflush=False)
+
+
+
+@contextmanager
+def sql_trace(engine, level=logging.INFO):
+    """
+    Activa el registro de SQL solo dentro del bloque y cuenta las sentencias
+    ejecutadas y su tiempo total, que se imprimen al salir
+    """
+    # Fuera del bloque el logger queda en su nivel original: sin coste de formateo
+    logger = logging.getLogger('sqlalchemy.engine')
+    previous_level = logger.level
+    handler = None
+    if not logger.hasHandlers():
+        handler = logging.StreamHandler()
+        logger.addHandler(handler)
+    stats = {'statements': 0, 'seconds': 0.0}
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        stats['seconds'] += time.perf_counter() - conn.info['query_start'].pop()
+        stats['statements'] += 1
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', after_cursor_execute)
+    logger.setLevel(level)
+    try:
+        yield stats
+    finally:
+        logger.setLevel(previous_level)
+        if handler is not None:
+            logger.removeHandler(handler)
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+        event.remove(engine, 'after_cursor_execute', after_cursor_execute)
+        print(f"SQL: {stats['statements']} sentencias en {stats['seconds'] * 1000:.2f} ms")
 
 # Crea la clase Base para los modelos declarativos
 Base = declarative_base()
@@ -36,7 +108,7 @@ class Author(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
 
     # - name: nombre del autor (obligatorio)
-    name = Column(String, nullable=False)
+    name = Column(String, nullable=False, index=True)
 
     # - Una relación con los libros (books) usando relationship
     books = relationship("Book", back_populates="author", cascade="all, delete")
@@ -57,7 +129,7 @@ class Book(Base):
     year = Column(Integer)
 
     # - author_id: clave foránea que relaciona con la tabla 'authors'
-    author_id = Column(Integer, ForeignKey("authors.id"))
+    author_id = Column(Integer, ForeignKey("authors.id"), index=True, nullable=False)
 
     # - Una relación con el autor usando relationship
     author = relationship("Author", back_populates="books")
@@ -97,10 +169,12 @@ def create_book(session, title, author_name, year=None):
     author = session.query(Author).filter_by(name=author_name).first()
 
     # Si no existe, crea un nuevo autor
+    # flush() obtiene su id sin cerrar la transacción: autor y libro se guardan
+    # con un único commit
     if not author:
         author = Author(name=author_name)
         session.add(author)
-        session.commit()
+        session.flush()
 
     # Crea un nuevo libro asociado al autor
     book = Book(title=title, year=year, author=author)
@@ -114,6 +188,21 @@ def create_book(session, title, author_name, year=None):
 
 
 
+def create_books_bulk(session, rows):
+    """
+    Inserta muchos libros de una vez a partir de diccionarios
+    con las claves title, year y author_id
+    Retorna la lista de ids generados, en el mismo orden que rows
+    """
+    # INSERT ... RETURNING por lotes: no crea objetos Book ni pasa por el unit of
+    # work, y los ids llegan en la misma ida y vuelta que la inserción
+    new_ids = session.scalars(
+        insert(Book).returning(Book.id, sort_by_parameter_order=True), rows
+    ).all()
+    session.commit()
+    return new_ids
+
+
 def get_all_books(session):
     """Obtiene todos los libros con sus autores"""
     # Consulta todos los libros y carga también los autores (joinedload)
@@ -124,13 +213,15 @@ def get_book_by_id(session, book_id):
     """Obtiene un libro específico por su ID"""
     # Busca un libro por su ID y retórnalo
     # Si no existe, retorna None
-    return session.query(Book).filter_by(id=book_id).first()
+    # session.get consulta primero el identity map: si el libro ya está cargado
+    # en la sesión no se lanza ninguna consulta SQL
+    return session.get(Book, book_id)
 
 
 def update_book(session, book_id, new_title=None, new_year=None):
     """Actualiza la información de un libro existente"""
     # Busca el libro por ID
-    book = session.query(Book).filter_by(id=book_id).first()
+    book = session.get(Book, book_id)
 
     # Si existe, actualiza los campos que tienen nuevos valores
     if not book:
@@ -152,7 +243,7 @@ def update_book(session, book_id, new_title=None, new_year=None):
 def delete_book(session, book_id):
     """Elimina un libro de la base de datos"""
     # Busca el libro por ID
-    book = session.query(Book).filter_by(id=book_id).first()
+    book = session.get(Book, book_id)
 
     # Si existe, elimínalo y haz commit
     if book:
@@ -177,8 +268,7 @@ def find_books_by_author(session, author_name):
 # Función principal para demostrar el uso de SQLAlchemy
 def main():
     """Función principal que demuestra el uso de SQLAlchemy"""
-    # Crea un motor y una sesión
-    Session = sessionmaker(bind=engine)
+    # Crea una sesión a partir de la fábrica del módulo
     session = Session()
     
     # Configura la base de datos
@@ -1,9 +1,11 @@
+import logging
+
 import pytest
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
-from ej3b1 import (Base, Author, Book, setup_database, create_book, get_all_books,
-                  get_book_by_id, update_book, delete_book, find_books_by_author)
+from ej3b1 import (Base, Author, Book, setup_database, create_book, create_books_bulk, sql_trace,
+                  get_all_books, get_book_by_id, update_book, delete_book, find_books_by_author)
 
 
 @pytest.fixture
@@ -55,6 +57,21 @@ def test_create_book_existing_author(session):
     assert book.author.id == author.id
 
 
+def test_create_books_bulk(session):
+    """Test inserting many books at once from mappings"""
+    author = Author(name="Bulk Author")
+    session.add(author)
+    session.commit()
+
+    rows = [{"title": f"Bulk Book {i}", "year": 2000 + i, "author_id": author.id} for i in range(5)]
+    new_ids = create_books_bulk(session, rows)
+
+    books = session.query(Book).filter_by(author_id=author.id).order_by(Book.id).all()
+    assert [b.title for b in books] == [f"Bulk Book {i}" for i in range(5)]
+    assert new_ids == [b.id for b in books]
+    assert books[0].author.name == "Bulk Author"
+
+
 def test_get_all_books(session):
     """Test retrieving all books"""
     # Create test data
@@ -177,3 +194,18 @@ def test_find_books_by_author(session):
     assert {b.title for b in books} == {"Book 1", "Book 2"}
     for book in books:
         assert book.author.name == "Target Author"
+
+
+def test_sql_trace_counts_statements(session, capsys):
+    """Test that sql_trace counts the statements run inside the block"""
+    engine = session.get_bind()
+    with sql_trace(engine, level=logging.WARNING) as stats:
+        create_book(session, "Traced Book", "Traced Author", 2020)
+
+    traced = stats['statements']
+    assert traced >= 2
+    assert f"SQL: {traced} sentencias" in capsys.readouterr().out
+
+    # Statements outside the block are not counted
+    session.query(Book).all()
+    assert stats['statements'] == traced
@@ -18,11 +18,29 @@ Libros:
 Esta versión utiliza Flask-SQLAlchemy como ORM para persistir los datos en una base de datos SQLite.
 """
 
-from flask import Flask, abort, jsonify, request
+import orjson
+from flask import Flask, Response, abort, request, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, insert, select
+from sqlalchemy.orm import joinedload
 
 db = SQLAlchemy()
 
+def ojsonify(data):
+    """Crea una respuesta JSON serializada con orjson (más rápido que jsonify)"""
+    return Response(orjson.dumps(data), mimetype='application/json')
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Aplica los PRAGMA de rendimiento a cada nueva conexión SQLite"""
+    # Con una base de datos en archivo, WAL y synchronous=NORMAL reducen los fsync
+    # por commit (en memoria, journal_mode=WAL no tiene efecto)
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.execute('PRAGMA synchronous=NORMAL')
+    cursor.execute('PRAGMA temp_store=MEMORY')
+    cursor.execute('PRAGMA cache_size=-65536')
+    cursor.close()
+
 # Define aquí tus modelos
 # Usa los mismos modelos que en el ejercicio anterior: Author y Book
 
@@ -34,9 +52,11 @@ class Author(db.Model):
     __tablename__ = 'authors'
 
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    name = db.Column(db.String, nullable=False)
+    name = db.Column(db.String, nullable=False, index=True)
 
-    books = db.relationship('Book', backref='author', cascade='all, delete-orphan')
+    # order_by: la relación llega ya ordenada por id, sin ordenar en Python
+    books = db.relationship('Book', backref='author', cascade='all, delete-orphan',
+                            order_by='Book.id')
 
     def to_dict(self):
         """Convierte el autor a un diccionario para la respuesta JSON"""
@@ -56,7 +76,7 @@ class Book(db.Model):
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     title = db.Column(db.String, nullable=False)
     year = db.Column(db.Integer, nullable=True)
-    author_id = db.Column(db.Integer, db.ForeignKey('authors.id'), nullable=False)
+    author_id = db.Column(db.Integer, db.ForeignKey('authors.id'), nullable=False, index=True)
 
     def to_dict(self):
         """Convierte el libro a un diccionario para la respuesta JSON"""
@@ -77,12 +97,16 @@ def create_app():
     # Configuración de la base de datos SQLite en memoria
     app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    # Caché de sentencias compiladas más amplia y sin registrar cada SQL
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'query_cache_size': 1200, 'echo': False}
     
     # Inicializa la base de datos con la aplicación
+    # (Flask-SQLAlchemy ya usa StaticPool para SQLite en memoria)
     db.init_app(app)
     
     # Crea todas las tablas en la base de datos
     with app.app_context():
+        event.listen(db.engine, 'connect', set_sqlite_pragmas)
         db.create_all()
     
     
@@ -92,8 +116,9 @@ def create_app():
         """
         Devuelve la lista completa de autores
         """
-        authors = Author.query.order_by(Author.id).all()
-        return jsonify([a.to_dict() for a in authors])
+        # Consulta Core: filas como diccionarios, sin construir objetos Author
+        rows = db.session.execute(select(Author.id, Author.name).order_by(Author.id)).mappings()
+        return ojsonify([dict(r) for r in rows])
 
     @app.route('/authors', methods=['POST'])
     def add_author():
@@ -104,24 +129,26 @@ def create_app():
         data = request.get_json() or {}
         name = data.get('name')
         if not name:
-            return jsonify({'error': 'Missing name'}), 400
+            return ojsonify({'error': 'Missing name'}), 400
 
-        author = Author(name=name)
-        db.session.add(author)
+        # INSERT ... RETURNING: la fila creada vuelve en la misma consulta, sin
+        # recargar el objeto tras el commit
+        stmt = insert(Author).values(name=name).returning(Author.id, Author.name)
+        row = db.session.execute(stmt).mappings().one()
         db.session.commit()
-        return jsonify(author.to_dict()), 201
+        return ojsonify(dict(row)), 201
 
     @app.route('/authors/<int:author_id>', methods=['GET'])
     def get_author(author_id):
         """
         Obtiene los detalles de un autor específico y su lista de libros
         """
-        author = Author.query.get_or_404(author_id)
-        # Obtener libros del autor
-        books = [b.to_dict() for b in Book.query.filter_by(author_id=author.id).order_by(Book.id).all()]
+        # Autor y libros en una sola consulta (LEFT OUTER JOIN)
+        author = db.get_or_404(Author, author_id, options=[joinedload(Author.books)])
+        books = [b.to_dict() for b in author.books]
         result = author.to_dict()
         result['books'] = books
-        return jsonify(result)
+        return ojsonify(result)
 
 
     # Endpoints de Libros
@@ -130,8 +157,26 @@ def create_app():
         """
         Devuelve la lista completa de libros
         """
-        books = Book.query.order_by(Book.id).all()
-        return jsonify([b.to_dict() for b in books])
+        # Columnas sueltas en lugar de objetos Book: no hay identity map ni
+        # instrumentación, y yield_per lee las filas por lotes de 1000
+        stmt = (
+            select(Book.id, Book.title, Book.year, Book.author_id)
+            .order_by(Book.id)
+            .execution_options(yield_per=1000)
+        )
+        result = db.session.execute(stmt).mappings()
+
+        def generate():
+            # Se emite el array JSON lote a lote, sin materializar la lista completa
+            yield b'['
+            first = True
+            for partition in result.partitions():
+                chunk = b','.join(orjson.dumps(dict(row)) for row in partition)
+                yield chunk if first else b',' + chunk
+                first = False
+            yield b']'
+
+        return Response(stream_with_context(generate()), mimetype='application/json')
 
     @app.route('/books', methods=['POST'])
     def add_book():
@@ -145,34 +190,40 @@ def create_app():
         year = data.get('year')
 
         if not title or author_id is None:
-            return jsonify({'error': 'Missing title or author_id'}), 400
+            return ojsonify({'error': 'Missing title or author_id'}), 400
 
-        # Verificar que el autor existe
-        author = Author.query.get(author_id)
-        if not author:
-            return jsonify({'error': 'Author not found'}), 400
+        # Verificar que el autor existe (solo su id, sin cargar el objeto Author)
+        if db.session.scalar(select(Author.id).where(Author.id == author_id)) is None:
+            return ojsonify({'error': 'Author not found'}), 400
 
-        book = Book(title=title, year=year, author_id=author_id)
-        db.session.add(book)
+        stmt = (
+            insert(Book)
+            .values(title=title, year=year, author_id=author_id)
+            .returning(Book.id, Book.title, Book.year, Book.author_id)
+        )
+        row = db.session.execute(stmt).mappings().one()
         db.session.commit()
-        return jsonify(book.to_dict()), 201
+        return ojsonify(dict(row)), 201
     
     @app.route('/books/<int:book_id>', methods=['GET'])
     def get_book(book_id):
         """
         Obtiene un libro específico por su ID
         """
-        book = Book.query.get_or_404(book_id)
-        return jsonify(book.to_dict())
+        stmt = select(Book.id, Book.title, Book.year, Book.author_id).where(Book.id == book_id)
+        row = db.session.execute(stmt).mappings().first()
+        if row is None:
+            abort(404)
+        return ojsonify(dict(row))
     
     @app.route('/books/<int:book_id>', methods=['DELETE'])
     def delete_book(book_id):
         """
         Elimina un libro específico por su ID
         """
-        book = Book.query.get(book_id)
+        book = db.session.get(Book, book_id)
         if not book:
-            return jsonify({'error': 'Not found'}), 404
+            return ojsonify({'error': 'Not found'}), 404
         db.session.delete(book)
         db.session.commit()
         return ('', 204)
@@ -184,9 +235,9 @@ def create_app():
         El cuerpo puede incluir "title" y/o "year"
         """
         data = request.get_json() or {}
-        book = Book.query.get(book_id)
+        book = db.session.get(Book, book_id)
         if not book:
-            return jsonify({'error': 'Not found'}), 404
+            return ojsonify({'error': 'Not found'}), 404
 
         title = data.get('title')
         year = data.get('year')
@@ -198,7 +249,7 @@ def create_app():
 
         db.session.add(book)
         db.session.commit()
-        return jsonify(book.to_dict())
+        return ojsonify(book.to_dict())
 
     return app
 
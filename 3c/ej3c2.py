@@ -13,21 +13,80 @@ Esta versión utiliza Flask para crear la API REST y PyJWT para trabajar con tok
 """
 
 import datetime
+import hmac
+import threading
+import time
 import token
 import jwt
-from flask import Flask, jsonify, request
+import orjson
+from collections import OrderedDict
+from flask import Flask, Response, request
 from functools import wraps
+from jwt.algorithms import HMACAlgorithm
 
 # Configuración JWT
 JWT_SECRET_KEY = "clave_secreta_jwt_para_firmar_tokens"  # En producción, usar una clave segura
 JWT_EXPIRATION_DELTA = datetime.timedelta(hours=1)  # Tiempo de expiración del token
 
+# Valores que se reutilizan en cada petición en lugar de recrearlos
+_JWT_KEY_BYTES = JWT_SECRET_KEY.encode('utf-8')
+_JWT_ALGS = ['HS256']
+_JWT_DECODE_OPTIONS = {'require': ['exp', 'sub']}
+
+
+class PrekeyedHS256Algorithm(HMACAlgorithm):
+    """
+    HS256 que reutiliza el estado HMAC ya inicializado con la clave secreta
+
+    Cada firma parte de una copia de ese estado en lugar de volver a derivar los
+    bloques ipad/opad de la clave. Con cualquier otra clave se comporta como el
+    HS256 estándar de PyJWT.
+    """
+
+    def __init__(self, secret):
+        super().__init__(HMACAlgorithm.SHA256)
+        self._secret = secret
+        self._secret_bytes = super().prepare_key(secret)
+        self._keyed_hmac = hmac.new(self._secret_bytes, digestmod=self.hash_alg)
+
+    def prepare_key(self, key):
+        # La clave propia ya se validó al construir el algoritmo
+        if key == self._secret or key == self._secret_bytes:
+            return self._secret_bytes
+        return super().prepare_key(key)
+
+    def sign(self, msg, key):
+        if key is self._secret_bytes:
+            mac = self._keyed_hmac.copy()
+            mac.update(msg)
+            return mac.digest()
+        return super().sign(msg, key)
+
+
+# PyJWT solo admite algoritmos personalizados en su registro global
+jwt.unregister_algorithm('HS256')
+jwt.register_algorithm('HS256', PrekeyedHS256Algorithm(JWT_SECRET_KEY))
+
+# Caché de tokens ya verificados (evita repetir la verificación HMAC en cada petición)
+JWT_CACHE_MAXSIZE = 1024
+JWT_CACHE_TTL = 60  # segundos
+
+# token -> (payload, instante hasta el que la entrada es válida); orden LRU
+_jwt_cache = OrderedDict()
+_jwt_cache_lock = threading.Lock()
+
 # Credenciales de usuario fijas (en una aplicación real estarían en una base de datos)
 USER_CREDENTIALS = {
     "usuario_demo": "password123"
 }
+# Contraseñas ya codificadas para compararlas con hmac.compare_digest
+_USER_CREDENTIALS_BYTES = {user: pwd.encode('utf-8') for user, pwd in USER_CREDENTIALS.items()}
+
+def ojsonify(data):
+    """Crea una respuesta JSON serializada con orjson (más rápido que jsonify)"""
+    return Response(orjson.dumps(data), mimetype='application/json')
 
-def generate_jwt_token(username):
+def generate_jwt_token(username) -> tuple[str, datetime.datetime]:
     """
     Genera un token JWT para un usuario
 
@@ -35,25 +94,63 @@ def generate_jwt_token(username):
         username: Nombre de usuario
 
     Returns:
-        str: Token JWT generado
+        tuple: (token JWT generado, fecha de expiración en UTC)
     """
    
     # Use timezone-aware UTC datetimes to avoid deprecation warnings
     now = datetime.datetime.now(datetime.timezone.utc)
     # Set iat a 1 segundo en el pasado para evitar errores por pequeña deriva de tiempo
     iat = int(now.timestamp()) - 1
-    exp_dt = now + JWT_EXPIRATION_DELTA
+    # Sin microsegundos, para que coincida exactamente con el claim 'exp'
+    exp_dt = (now + JWT_EXPIRATION_DELTA).replace(microsecond=0)
     exp = int(exp_dt.timestamp())
     payload = {
         'sub': username,
         'iat': iat,
         'exp': exp
     }
-    token = jwt.encode(payload, JWT_SECRET_KEY, algorithm='HS256')
+    token = jwt.encode(payload, _JWT_KEY_BYTES, algorithm='HS256')
     # jwt.encode may return bytes in some versions
     if isinstance(token, bytes):
         token = token.decode('utf-8')
-    return token
+    return token, exp_dt
+
+def decode_jwt_token(token):
+    """
+    Decodifica y verifica un token JWT, reutilizando verificaciones previas del mismo token
+
+    Una entrada de la caché nunca vive más allá del 'exp' del token: al caducar se
+    descarta y jwt.decode() vuelve a lanzar ExpiredSignatureError.
+
+    Args:
+        token: Token JWT recibido
+
+    Returns:
+        dict: Payload del token
+
+    Raises:
+        jwt.ExpiredSignatureError: Si el token ha expirado
+        jwt.InvalidTokenError: Si el token no es válido
+    """
+    now = time.time()
+    with _jwt_cache_lock:
+        entry = _jwt_cache.get(token)
+        if entry is not None:
+            payload, valid_until = entry
+            if now < valid_until:
+                _jwt_cache.move_to_end(token)
+                # Copia: quien modifique el payload no altera la entrada en caché
+                return dict(payload)
+            del _jwt_cache[token]
+
+    payload = jwt.decode(token, _JWT_KEY_BYTES, algorithms=_JWT_ALGS, options=_JWT_DECODE_OPTIONS)
+
+    valid_until = min(now + JWT_CACHE_TTL, payload.get('exp', float('inf')))
+    with _jwt_cache_lock:
+        _jwt_cache[token] = (payload, valid_until)
+        if len(_jwt_cache) > JWT_CACHE_MAXSIZE:
+            _jwt_cache.popitem(last=False)
+    return dict(payload)
 
 def jwt_required(func):
     """
@@ -77,23 +174,20 @@ def jwt_required(func):
         3. Decodificar y verificar el token usando jwt.decode()
         4. Si hay algún error (token expirado, inválido, etc.), devolver un error apropiado
         """
-        auth_header = request.headers.get('Authorization')
-        if not auth_header:
-            return jsonify({'error': 'Token inválido '}), 401
-
-        parts = auth_header.split()
-        if len(parts) != 2 or parts[0].lower() != 'bearer':
-            return jsonify({'error': 'Token inválido '}), 401
+        # Comprobar solo el prefijo de 7 caracteres: sin split() ni lower() de toda la cabecera
+        auth_header = request.headers.get('Authorization', '')
+        if len(auth_header) < 8 or auth_header[:7].lower() != 'bearer ':
+            return ojsonify({'error': 'Token inválido '}), 401
 
-        token = parts[1]
+        token = auth_header[7:].strip()
         try:
-            decoded = jwt.decode(token, JWT_SECRET_KEY, algorithms=['HS256'])
+            decoded = decode_jwt_token(token)
             # attach user info if needed
             request.jwt_payload = decoded
         except jwt.ExpiredSignatureError:
-            return jsonify({'error': 'Token expirado'}), 401
+            return ojsonify({'error': 'Token expirado'}), 401
         except jwt.InvalidTokenError:
-            return jsonify({'error': 'Token inválido o ausente'}), 401
+            return ojsonify({'error': 'Token inválido o ausente'}), 401
 
         return func(*args, **kwargs)
     return decorated_function
@@ -117,7 +211,7 @@ def create_app():
                 "message": "Este es un endpoint público, cualquiera puede acceder"
             }
         """
-        return jsonify({
+        return ojsonify({
             "message": "Este es un endpoint público, cualquiera puede acceder"
         })
 
@@ -157,20 +251,18 @@ def create_app():
         username = data.get('username')
         password = data.get('password')
 
-        if not username or not password:
-            return jsonify({'error': 'Credenciales inválidas'}), 401
+        if not username or not password or not isinstance(password, str):
+            return ojsonify({'error': 'Credenciales inválidas'}), 401
 
-        expected = USER_CREDENTIALS.get(username)
-        if expected is None or expected != password:
-            return jsonify({'error': 'Credenciales inválidas'}), 401
+        # compare_digest: comparación en C y en tiempo constante (sin canal lateral)
+        expected = _USER_CREDENTIALS_BYTES.get(username)
+        if expected is None or not hmac.compare_digest(expected, password.encode('utf-8')):
+            return ojsonify({'error': 'Credenciales inválidas'}), 401
 
-        token = generate_jwt_token(username)
-    
-        # Calcular expires_at ISO format (sin usar métodos deprecados)
-        exp_ts = jwt.decode(token, JWT_SECRET_KEY, algorithms=['HS256'], options={"verify_exp": False}).get('exp')
-    
-        expires_at = datetime.datetime.fromtimestamp(exp_ts, tz=datetime.timezone.utc).isoformat()
-        return jsonify({'token': token, 'expires_at': expires_at})
+        # generate_jwt_token ya devuelve la expiración: no hace falta decodificar el token
+        token, exp_dt = generate_jwt_token(username)
+        expires_at = exp_dt.isoformat()
+        return ojsonify({'token': token, 'expires_at': expires_at})
 
     @app.route('/api/secret', methods=['GET'])
     @jwt_required
@@ -197,7 +289,7 @@ def create_app():
                 "error": "Token inválido o ausente"
             }
         """
-        return jsonify({
+        return ojsonify({
             'message': '¡Has accedido al secreto con JWT!',
             'secret': 'La respuesta a la vida, el universo y todo lo demás es 42'
         })
@@ -7,8 +7,10 @@ import json
 from flask import Flask
 from flask.testing import FlaskClient
 import time
+from types import SimpleNamespace
 import jwt
-from ej3c2 import create_app, JWT_SECRET_KEY, USER_CREDENTIALS
+import ej3c2
+from ej3c2 import create_app, decode_jwt_token, JWT_SECRET_KEY, USER_CREDENTIALS
 
 @pytest.fixture
 def client() -> FlaskClient:
@@ -113,3 +115,52 @@ def test_protected_endpoint_valid_token(client, auth_token):
     assert response.status_code == 200
     assert 'secret' in response.json
     assert '42' in response.json.get('secret', '')
+
+def test_protected_endpoint_token_with_audience(client):
+    """Prueba que se rechaza un token emitido para otra audiencia"""
+    payload = {
+        'sub': 'usuario_demo',
+        'exp': int(time.time()) + 60,
+        'aud': 'otro-servicio'
+    }
+    token = jwt.encode(payload, JWT_SECRET_KEY, algorithm='HS256')
+    response = client.get('/api/secret', headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code == 401
+
+def test_protected_endpoint_cached_token_expires(client, monkeypatch):
+    """Prueba que un token en caché se vuelve a verificar al llegar a su expiración"""
+    now = time.time()
+    payload = {
+        'sub': 'usuario_demo',
+        'iat': int(now) - 1,
+        'exp': int(now) + 30
+    }
+    token = jwt.encode(payload, JWT_SECRET_KEY, algorithm='HS256')
+    headers = {'Authorization': f'Bearer {token}'}
+
+    # Contar las verificaciones reales y controlar el reloj de la caché
+    decode_calls = []
+    real_decode = jwt.decode
+    def counting_decode(*args, **kwargs):
+        decode_calls.append(args[0])
+        return real_decode(*args, **kwargs)
+    monkeypatch.setattr(ej3c2.jwt, 'decode', counting_decode)
+    monkeypatch.setattr(ej3c2, 'time', SimpleNamespace(time=lambda: now))
+
+    # Dos peticiones seguidas: la segunda usa el payload en caché
+    assert client.get('/api/secret', headers=headers).status_code == 200
+    assert client.get('/api/secret', headers=headers).status_code == 200
+    assert decode_calls == [token]
+
+    # Pasado 'exp' según el reloj de la caché, la entrada ya no se reutiliza
+    monkeypatch.setattr(ej3c2, 'time', SimpleNamespace(time=lambda: payload['exp'] + 1))
+    client.get('/api/secret', headers=headers)
+    assert decode_calls == [token, token]
+
+def test_decode_jwt_token_returns_copy():
+    """Prueba que modificar el payload devuelto no altera la caché"""
+    payload = {'sub': 'usuario_demo', 'exp': int(time.time()) + 60}
+    token = jwt.encode(payload, JWT_SECRET_KEY, algorithm='HS256')
+
+    decode_jwt_token(token)['sub'] = 'otro_usuario'
+    assert decode_jwt_token(token)['sub'] == 'usuario_demo'